@@ -0,0 +1,329 @@
+import os
+import glob
+import json
+import re
+import stat
+import tempfile
+import warnings
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from collections import Counter
+from typing import List, Iterable
+
+from levels import ROOT_DIR, assign_rooms
+
+
+PARSE_CACHE_PATH = os.path.join(ROOT_DIR, "Logs", "parse_cache.json")
+PARSE_CACHE_VERSION = 1
+
+# Regex patterns
+ROOM_RE = re.compile(r'Entering screen "([^"]+)"')
+MESSAGE_RE = re.compile(r'Showing\s+(\w+)\s+death\s+screen(?:\s+message\s+"([^"]+)")?', re.IGNORECASE)
+DEATH_RE = re.compile(r'The player died at {X:(-?\d+)\s+Y:(-?\d+)}')
+TIMESTAMP_RE = re.compile(r'\[(.*?)\]')
+LOG_START_RE = re.compile(r'EngagementBaiting-(\d{14})')
+
+def try_parse(parse, file_path: str) -> any:
+    """
+    Return parse(file_path), or None with a warning if the file cannot be parsed.
+    """
+    try:
+        return parse(file_path)
+    except Exception as e:
+        warnings.warn(f"Could not parse '{file_path}': {e}")
+        return None
+
+class ParseCache:
+    """
+    Cache of parsed archive files, keyed by file path and validated by file size and modification time.
+    Entries are kept as JSON, so parsers must return JSON-serializable values.
+    Files that fail to parse are cached as None, so they are not read again until they change.
+    """
+    def __init__(self, cache_path: str = PARSE_CACHE_PATH):
+        self.cache_path = cache_path
+        self.dirty = False
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = dict()
+        self._entries = cache.get("entries", dict()) if cache.get("version") == PARSE_CACHE_VERSION else dict()
+
+    def get(self, kind: str, file_path: str, parse) -> any:
+        """
+        Return the cached result of parse(file_path), parsing the file again if it changed.
+        """
+        key = f"{kind}:{os.path.abspath(file_path)}"
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return try_parse(parse, file_path)
+
+        entry = self._entries.get(key)
+        if entry is None or entry["size"] != file_stat.st_size or entry["mtime_ns"] != file_stat.st_mtime_ns:
+            entry = {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns, "data": try_parse(parse, file_path)}
+            self._entries[key] = entry
+            self.dirty = True
+        elif entry["data"] is None:
+            warnings.warn(f"Skipping '{file_path}', which could not be parsed")
+        return entry["data"]
+
+    def _file_mode(self) -> int:
+        """
+        Return the mode of the existing cache file, or the default mode of new files under the current umask.
+        """
+        try:
+            return stat.S_IMODE(os.stat(self.cache_path).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def save(self) -> None:
+        """
+        Write the cache if it changed, dropping entries of files that were moved or deleted.
+        The file is replaced atomically, so concurrent readers never see a partially written cache.
+        """
+        stale = [key for key in self._entries if not os.path.exists(key.split(":", 1)[1])]
+        for key in stale:
+            del self._entries[key]
+        if not (self.dirty or stale):
+            return
+
+        cache_dir = os.path.dirname(self.cache_path) or "."
+        tmp_path = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_dir, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({"version": PARSE_CACHE_VERSION, "entries": self._entries}, f)
+            # Temporary files are private (0600); keep the cache readable by other users like a regular file
+            os.chmod(tmp_path, self._file_mode())
+            os.replace(tmp_path, self.cache_path)
+            self.dirty = False
+        except OSError:
+            # The cache is only an optimization; failing to write it is not fatal
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def extract_archives(archive_path: str) -> dict:
+    """
+    Extract all PlayerPositions.csv and EngagementBaiting-*.log files from every folder in the archive_path.
+    """
+    results = dict()
+    # Each subfolder is named after the date and time it was saved
+    for subdir in os.listdir(archive_path):
+        folder_path = os.path.join(archive_path, subdir)
+        if not os.path.isdir(folder_path):
+            continue
+
+        # Find PlayerPositions.csv
+        csv_path = os.path.join(folder_path, "PlayerPositions.csv")
+        if not os.path.isfile(csv_path):
+            continue
+
+        # Find EngagementBaiting-*.log
+        log_files = glob.glob(os.path.join(folder_path, "EngagementBaiting-*.log"))
+        log_path = log_files if log_files else None
+
+        # Find a .txt file in the subfolder and use its name (before .txt) as the user_id
+        txt_files = [f for f in os.listdir(folder_path) if f.lower().endswith(".txt")]
+        user_id = os.path.splitext(txt_files[0])[0] if txt_files else subdir
+
+        # Ensure unique keys in results
+        base_id = user_id
+        counter = 1
+        while user_id in results:
+            user_id = f"{base_id}_{counter}"
+            counter += 1
+
+        results[user_id] = (csv_path, log_path)
+    return results
+
+def log_start_time(log_path: str) -> datetime | None:
+    """
+    Return the time a log file was started, as encoded in its file name.
+    """
+    match = LOG_START_RE.search(os.path.basename(log_path))
+    return datetime.strptime(match.group(1), "%Y%m%d%H%M%S") if match else None
+
+def filter_archives(archives: dict, players: Iterable[str] | None = None, since: datetime | None = None, until: datetime | None = None) -> dict:
+    """
+    Select the archives of the given players that have a log file started within [since, until].
+    Archives without log files are dropped when a date range is given.
+    """
+    players = set(players) if players is not None else None
+    results = dict()
+    for user_id, (csv_path, log_paths) in archives.items():
+        if players is not None and user_id not in players:
+            continue
+
+        if since is not None or until is not None:
+            start_times = [t for t in map(log_start_time, log_paths or []) if t is not None]
+            if not any((since is None or t >= since) and (until is None or t <= until) for t in start_times):
+                continue
+
+        results[user_id] = (csv_path, log_paths)
+    return results
+
+def parse_log_deaths(log_path: str) -> List[tuple]:
+    """
+    Extract the death events from a single log file.
+    returns: list of (timestamp, room, x, y, sentiment, message) tuples
+    """
+    if not os.path.isfile(log_path):
+        return []
+
+    data = []
+    current_room = None
+    current_event = None
+
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            # Extract timestamp
+            timestamp_match = TIMESTAMP_RE.search(line)
+            timestamp = timestamp_match.group(1) if timestamp_match else None
+
+            # Detect entering a new room
+            room_match = ROOM_RE.search(line)
+            if room_match:
+                current_room = room_match.group(1)
+                continue
+
+            # Detect death message and sentiment
+            msg_match = MESSAGE_RE.search(line)
+            if msg_match:
+                sentiment, message = msg_match.groups()
+                current_event = (timestamp, current_room, sentiment, message)
+                continue
+
+            # Detect coordinates of death
+            death_match = DEATH_RE.search(line)
+            if death_match and current_event:
+                x, y = map(int, death_match.groups())
+                timestamp, room, sentiment, message = current_event
+                data.append((timestamp, room, x, y, sentiment, message))
+                current_event = None
+
+    return data
+
+class DeathEvents:
+    """
+    Append-only columnar table of the death events of all players.
+    Each player's deaths are stored contiguously, so per-player data are offset slices of the shared columns.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.player_ids: List[str] = []
+        self._offsets = [0]
+        self._size = 0
+        self._n_logs = 0
+        self._frame = None
+        self._sentiments = None
+        self._columns = {
+            'player': np.empty(capacity, dtype=np.int32),
+            'log': np.empty(capacity, dtype=np.int32),
+            'timestamp': np.empty(capacity, dtype=object),
+            'room': np.empty(capacity, dtype=object),
+            'x': np.empty(capacity, dtype=np.float64),
+            'y': np.empty(capacity, dtype=np.float64),
+            'sentiment': np.empty(capacity, dtype=object),
+            'message': np.empty(capacity, dtype=object),
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def n_players(self) -> int:
+        return len(self.player_ids)
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self._columns['player'])
+        if self._size + extra <= capacity:
+            return
+
+        # Grow geometrically so appends stay amortized O(1); an empty table starts from a capacity of one
+        capacity = max(capacity, 1)
+        while capacity < self._size + extra:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append_player(self, player_id: str, logs: List[List[tuple]]) -> int:
+        """
+        Append the deaths of a new player, given per log file, and return the player's index in the table.
+        """
+        if self._frame is not None:
+            raise RuntimeError("Cannot append to a DeathEvents table after it has been read")
+
+        pid = len(self.player_ids)
+        self._reserve(sum(len(deaths) for deaths in logs))
+
+        for deaths in logs:
+            start, end = self._size, self._size + len(deaths)
+            self._columns['player'][start:end] = pid
+            self._columns['log'][start:end] = self._n_logs
+            if deaths:
+                timestamps, rooms, xs, ys, sentiments, messages = zip(*deaths)
+                self._columns['timestamp'][start:end] = timestamps
+                self._columns['room'][start:end] = rooms
+                self._columns['x'][start:end] = xs
+                self._columns['y'][start:end] = ys
+                self._columns['sentiment'][start:end] = sentiments
+                self._columns['message'][start:end] = messages
+
+            self._size = end
+            self._n_logs += 1
+
+        self._offsets.append(self._size)
+        self.player_ids.append(player_id)
+        return pid
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """
+        The full table as a DataFrame: ['player', 'log', 'timestamp', 'room', 'x', 'y', 'sentiment', 'message'].
+        Built once on first access; the table is read-only afterwards.
+        """
+        if self._frame is None:
+            columns = {name: column[:self._size] for name, column in self._columns.items()}
+            # The logged room lags behind screen transitions; correct it from the death coordinates.
+            # Each log file covers a single level, which resolves deaths logged before the first room.
+            columns['room'] = assign_rooms(columns['x'], columns['y'], columns['room'], groups=columns['log'])
+            self._frame = pd.DataFrame(columns, copy=False)
+            self._columns = None
+        return self._frame
+
+    def player_sentiments(self) -> pd.Series:
+        """
+        Return the most frequent sentiment of each player, indexed by player index (None for players without deaths).
+        """
+        if self._sentiments is None:
+            # Offset slices of the shared sentiment column, one per player
+            column = self.frame['sentiment'].to_numpy()
+            sentiments = []
+            for start, end in zip(self._offsets, self._offsets[1:]):
+                counts = Counter(s for s in column[start:end] if isinstance(s, str))
+                sentiments.append(counts.most_common(1)[0][0] if counts else None)
+            self._sentiments = pd.Series(sentiments, dtype=object)
+        return self._sentiments
+
+def build_death_events(archives: dict, cache: ParseCache | None = None) -> DeathEvents:
+    """
+    Parse the logs of every player in the archives into a single death event table, reusing cached parses if given.
+    Players are indexed in the order of the archives.
+    """
+    deaths = DeathEvents()
+    for user_id, (_, log_paths) in archives.items():
+        player_logs = []
+        for log_path in log_paths or []:
+            if cache is not None:
+                log_deaths = cache.get("deaths", log_path, parse_log_deaths)
+            else:
+                log_deaths = try_parse(parse_log_deaths, log_path)
+            player_logs.append(log_deaths or [])
+        deaths.append_player(user_id, player_logs)
+    return deaths
@@ -0,0 +1,346 @@
+import os
+import glob
+import json
+import re
+import struct
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, BinaryIO
+
+
+# Constants
+REAL_SCALAR = 8
+# Paths are anchored to the mod's root directory, so the registry does not depend on the working directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAP_WORLD_DIR = os.path.join(ROOT_DIR, "Maps", "World")
+MAP_IMAGE_DIR = os.path.join(ROOT_DIR, "Maps", "Images")
+LEVEL_INDEX_PATH = os.path.join(ROOT_DIR, "Logs", "level_index.json")
+LEVEL_ORDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+LEVEL_INDEX_VERSION = 1
+
+@dataclass(frozen=True)
+class RoomBounds:
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+
+@dataclass(frozen=True)
+class LevelInfo:
+    name: str
+    img_path: str
+    offset: tuple
+    rooms: List[str]
+    bounds: Dict[str, RoomBounds] = field(default_factory=dict, compare=False)
+
+def _read_varint(f: BinaryIO) -> int:
+    """
+    Read a 7-bit encoded integer as written by .NET's BinaryWriter.
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = f.read(1)[0]
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result
+
+def _read_string(f: BinaryIO) -> str:
+    return f.read(_read_varint(f)).decode("utf-8")
+
+def _read_short(f: BinaryIO) -> int:
+    return struct.unpack("<h", f.read(2))[0]
+
+def _read_element(f: BinaryIO, lookup: List[str]) -> tuple:
+    """
+    Read a single map element and its children.
+    returns: (name, attributes, children)
+    """
+    name = lookup[_read_short(f)]
+    attributes = dict()
+    for _ in range(f.read(1)[0]):
+        key = lookup[_read_short(f)]
+        value_type = f.read(1)[0]
+        if value_type == 0:
+            value = f.read(1)[0] != 0
+        elif value_type == 1:
+            value = f.read(1)[0]
+        elif value_type == 2:
+            value = _read_short(f)
+        elif value_type == 3:
+            value = struct.unpack("<i", f.read(4))[0]
+        elif value_type == 4:
+            value = struct.unpack("<f", f.read(4))[0]
+        elif value_type == 5:
+            value = lookup[_read_short(f)]
+        elif value_type == 6:
+            value = _read_string(f)
+        elif value_type == 7:
+            # Run-length encoded string (tiles); not needed for room bounds
+            f.read(_read_short(f))
+            value = None
+        else:
+            raise ValueError(f"Unknown attribute type {value_type} for '{key}' in element '{name}'")
+        attributes[key] = value
+
+    children = [_read_element(f, lookup) for _ in range(_read_short(f))]
+    return name, attributes, children
+
+def read_map_rooms(bin_path: str) -> List[RoomBounds]:
+    """
+    Read the room names and bounds (in game units) from a Celeste .bin map file.
+    """
+    with open(bin_path, "rb") as f:
+        header = _read_string(f)
+        if header != "CELESTE MAP":
+            raise ValueError(f"'{bin_path}' is not a Celeste map file")
+        _read_string(f) # package name
+
+        lookup = [_read_string(f) for _ in range(_read_short(f))]
+        _, _, children = _read_element(f, lookup)
+
+    rooms = []
+    for child_name, _, levels in children:
+        if child_name != "levels":
+            continue
+        for _, attrs, _ in levels:
+            # Celeste strips the "lvl_" prefix from room names when loading
+            name = attrs["name"]
+            if name.startswith("lvl_"):
+                name = name[len("lvl_"):]
+            rooms.append(RoomBounds(name, int(attrs["x"]), int(attrs["y"]), int(attrs["width"]), int(attrs["height"])))
+    return rooms
+
+def _level_name(bin_path: str) -> str:
+    """
+    Derive the level name from a map file name, dropping the ordering prefix ("1-Tutorial.bin" -> "Tutorial").
+    """
+    stem = os.path.splitext(os.path.basename(bin_path))[0]
+    return re.sub(r"^\d+-", "", stem)
+
+def _load_order(order_path: str) -> dict:
+    """
+    Load the optional level overrides, keyed by map file name: {"name": display name, "rooms": [rooms in play order]}.
+    """
+    try:
+        with open(order_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except OSError:
+        return dict()
+
+def _load_index(index_path: str) -> dict:
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+    if index.get("version") != LEVEL_INDEX_VERSION:
+        return dict()
+    return index.get("maps", dict())
+
+def _save_index(index_path: str, maps: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump({"version": LEVEL_INDEX_VERSION, "maps": maps}, f, indent=1)
+    except OSError:
+        # The index is only a cache; failing to write it is not fatal
+        pass
+
+@lru_cache(maxsize=None)
+def load_level_data(world_dir: str = MAP_WORLD_DIR, image_dir: str = MAP_IMAGE_DIR, index_path: str = LEVEL_INDEX_PATH, order_path: str = LEVEL_ORDER_PATH) -> Dict[str, LevelInfo]:
+    """
+    Discover all levels from the map files in world_dir and pair them with their image in image_dir.
+    Parsed room bounds are cached in a sidecar index keyed by file size and modification time.
+    Level names and room order come from order_path where given; otherwise the level is named after its map file
+    and its rooms keep the order of the map file (which Celeste stores alphabetically).
+    Raises FileNotFoundError if world_dir contains no map files.
+    """
+    bin_paths = sorted(glob.glob(os.path.join(world_dir, "*.bin")))
+    if not bin_paths:
+        raise FileNotFoundError(f"No map files (*.bin) found in '{world_dir}'")
+
+    order = _load_order(order_path)
+    cached = _load_index(index_path)
+    maps = dict()
+    level_data = dict()
+
+    for bin_path in bin_paths:
+        file_name = os.path.basename(bin_path)
+        stat = os.stat(bin_path)
+
+        entry = cached.get(file_name)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            rooms = read_map_rooms(bin_path)
+            entry = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "rooms": [[r.name, r.x, r.y, r.width, r.height] for r in rooms],
+            }
+        maps[file_name] = entry
+
+        bounds = {name: RoomBounds(name, x, y, w, h) for name, x, y, w, h in entry["rooms"]}
+        if not bounds:
+            continue
+
+        # The level image is rendered from the top-left corner of the outermost rooms
+        min_x = min(b.x for b in bounds.values())
+        min_y = min(b.y for b in bounds.values())
+
+        # Rooms in play order first, then any rooms missing from the order file
+        overrides = order.get(file_name, dict())
+        rooms = [room for room in overrides.get("rooms", []) if room in bounds]
+        rooms += [room for room in bounds if room not in rooms]
+
+        name = overrides.get("name", _level_name(bin_path))
+        level_data[name] = LevelInfo(
+            name=name,
+            img_path=os.path.join(image_dir, f"{_level_name(bin_path)}.png"),
+            offset=(min_x // REAL_SCALAR, min_y // REAL_SCALAR),
+            rooms=rooms,
+            bounds=bounds,
+        )
+
+    if maps != cached:
+        _save_index(index_path, maps)
+
+    return level_data
+
+@lru_cache(maxsize=None)
+def room_to_level() -> Dict[str, LevelInfo]:
+    """
+    Reverse index for fast lookups by room name.
+    """
+    mapping = dict()
+    for level in load_level_data().values():
+        for room in level.rooms:
+            if room in mapping:
+                raise ValueError(f"Duplicate room '{room}' assigned to multiple levels")
+            mapping[room] = level
+    return mapping
+
+def get_level_info_by_room(room_name: str) -> LevelInfo | None:
+    """
+    Return LevelInfo for a given room name, or None if unknown.
+    """
+    return room_to_level().get(room_name)
+
+class RoomIndex:
+    """
+    Spatial index of the room rectangles of a single level.
+    Points are sorted by x once per query so that each room only has to test the points within its x-range.
+    """
+    def __init__(self, bounds: List[RoomBounds]):
+        rooms = list(bounds)
+        self.names = np.array([r.name for r in rooms] + [None], dtype=object)
+        self.x0 = np.array([r.x for r in rooms], dtype=float)
+        self.x1 = np.array([r.x + r.width for r in rooms], dtype=float)
+        self.y0 = np.array([r.y for r in rooms], dtype=float)
+        self.y1 = np.array([r.y + r.height for r in rooms], dtype=float)
+
+    def indices_for(self, xs, ys) -> np.ndarray:
+        """
+        Return the index of the room containing each point, or -1 if the point lies outside every room.
+        Rooms are half-open rectangles [x, x + width) x [y, y + height).
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        result = np.full(xs.shape, -1, dtype=np.intp)
+
+        # Sort points once, then each room is a contiguous slice of the sorted x coordinates
+        order = np.argsort(xs, kind="stable")
+        sorted_xs = xs[order]
+        starts = np.searchsorted(sorted_xs, self.x0, side="left")
+        ends = np.searchsorted(sorted_xs, self.x1, side="left")
+
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            if start == end:
+                continue
+            candidates = order[start:end]
+            cy = ys[candidates]
+            inside = (cy >= self.y0[i]) & (cy < self.y1[i]) & (result[candidates] < 0)
+            result[candidates[inside]] = i
+        return result
+
+    def rooms_for(self, xs, ys) -> np.ndarray:
+        """
+        Return the name of the room containing each point, or None if the point lies outside every room.
+        """
+        return self.names[self.indices_for(xs, ys)]
+
+@lru_cache(maxsize=None)
+def get_room_index(level_name: str) -> RoomIndex:
+    """
+    Return the (memoized) room index of a level.
+    """
+    return RoomIndex(list(load_level_data()[level_name].bounds.values()))
+
+def assign_rooms(xs, ys, labels, groups=None) -> np.ndarray:
+    """
+    Validate and back-fill room labels from coordinates.
+    Points are looked up within the level of their label. Unlabelled points take the level of the labelled points in
+    the same group (e.g. the log file they came from) if those agree on a single level; otherwise they are only
+    assigned if exactly one level has a room containing them. Labels of points outside every room, and labels of rooms
+    that are not part of any map, are kept as they are.
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    labels = np.asarray(labels, dtype=object)
+    result = labels.copy()
+
+    # Level of each point as an index into level_names (-1 if unknown), looked up once per distinct label
+    level_names = list(load_level_data())
+    level_ids = {room: level_names.index(level.name) for room, level in room_to_level().items()}
+    codes, uniques = pd.factorize(labels)
+    point_levels = np.array([level_ids.get(room, -1) for room in uniques] + [-1], dtype=np.intp)[codes]
+    labelled = codes >= 0
+
+    if groups is not None:
+        group_codes, _ = pd.factorize(np.asarray(groups))
+        known = point_levels >= 0
+        spans = pd.Series(point_levels[known]).groupby(group_codes[known]).agg(["min", "max"])
+        spans = spans[spans["min"] == spans["max"]]
+        group_levels = np.full(group_codes.max(initial=-1) + 2, -1, dtype=np.intp)
+        group_levels[spans.index.to_numpy()] = spans["min"].to_numpy()
+        point_levels = np.where(labelled, point_levels, group_levels[group_codes])
+
+    unassigned = np.flatnonzero(~labelled & (point_levels < 0))
+    matches = np.zeros(unassigned.size, dtype=np.intp)
+    matched_rooms = np.empty(unassigned.size, dtype=object)
+    for level_id, level_name in enumerate(level_names):
+        index = get_room_index(level_name)
+
+        # Points within this level
+        positions = np.flatnonzero(point_levels == level_id)
+        if positions.size:
+            rooms = index.indices_for(xs[positions], ys[positions])
+            found = rooms >= 0
+            result[positions[found]] = index.names[rooms[found]]
+
+        # Points without a known level; levels share coordinates, so count the levels that contain them
+        if unassigned.size:
+            rooms = index.indices_for(xs[unassigned], ys[unassigned])
+            found = rooms >= 0
+            matches += found
+            matched_rooms[found] = index.names[rooms[found]]
+
+    unique = matches == 1
+    result[unassigned[unique]] = matched_rooms[unique]
+    return result
+
+def room_limits(room_name: str) -> tuple | None:
+    """
+    Return the fixed plot limits ((x_min, x_max), (y_max, y_min)) of a room, or None if the room is unknown.
+    The y-axis is inverted, matching the game's coordinate system.
+    """
+    level_info = get_level_info_by_room(room_name)
+    if level_info is None:
+        return None
+
+    bounds = level_info.bounds[room_name]
+    return (bounds.x, bounds.x + bounds.width), (bounds.y + bounds.height, bounds.y)
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable
+
+from levels import load_level_data, room_to_level
+from events import DeathEvents, ParseCache, PARSE_CACHE_PATH, extract_archives, build_death_events, try_parse
+
+
+STAGES = ("paths", "deaths", "sentiment", "time")
+METRIC_FORMATS = ("json", "csv")
+VISIT_COLUMNS = ['player', 'room', 'start', 'end', 'samples', 'attempts']
+CSV_CHUNK_SIZE = 100_000
+
+def _room_levels(rooms: pd.Series) -> pd.Series:
+    """
+    Map room names to the name of their level (None for unknown rooms).
+    """
+    level_of = {room: level.name for room, level in room_to_level().items()}
+    return rooms.map(level_of).astype(object).where(lambda s: s.notna(), None)
+
+def deaths_per_room(deaths: DeathEvents) -> pd.DataFrame:
+    """
+    Total and average deaths per room, in play order followed by rooms that are not part of any map.
+    Averages are taken over the players that died in the room.
+    returns: index 'room'; columns ['level', 'deaths', 'players', 'average']
+    """
+    frame = deaths.frame
+
+    ordered_rooms = [room for lvl in load_level_data().values() for room in lvl.rooms]
+    extra_rooms = [r for r in frame['room'].dropna().unique() if r not in ordered_rooms]
+    final_rooms = pd.Index(ordered_rooms + extra_rooms, name='room')
+
+    counts = frame['room'].value_counts().reindex(final_rooms, fill_value=0)
+    players = frame.groupby('room')['player'].nunique().reindex(final_rooms, fill_value=0)
+
+    # Avoid division by zero
+    average = (counts / players.replace(0, np.nan)).fillna(0)
+
+    return pd.DataFrame({
+        'level': _room_levels(final_rooms.to_series()),
+        'deaths': counts,
+        'players': players,
+        'average': average,
+    }, index=final_rooms)
+
+def deaths_per_sentiment(deaths: DeathEvents) -> pd.DataFrame:
+    """
+    Total deaths per sentiment category, averaged over the players assigned to each category.
+    A player is assigned the sentiment of the majority of their deaths.
+    returns: index 'sentiment' (most deaths first); columns ['deaths', 'players', 'average']
+    """
+    counts = deaths.frame['sentiment'].value_counts()
+    players = deaths.player_sentiments().value_counts().reindex(counts.index, fill_value=0)
+
+    # Avoid division by zero
+    average = (counts / players.replace(0, np.nan)).fillna(0)
+
+    result = pd.DataFrame({'deaths': counts, 'players': players, 'average': average})
+    result.index.name = 'sentiment'
+    return result
+
+def deaths_per_room_per_sentiment(deaths: DeathEvents) -> pd.DataFrame:
+    """
+    Total and average deaths per room and sentiment category, for rooms that are part of a map.
+    returns: columns ['level', 'room', 'sentiment', 'deaths', 'average']
+    """
+    frame = deaths.frame
+    counts = frame.groupby(['room', 'sentiment']).size().rename('deaths').reset_index()
+    counts.insert(0, 'level', _room_levels(counts['room']))
+    counts = counts[counts['level'].notna()].reset_index(drop=True)
+
+    # Avoid division by zero
+    players = deaths.player_sentiments().value_counts()
+    denom = counts['sentiment'].map(players).fillna(0).replace(0, np.nan)
+    counts['average'] = (counts['deaths'] / denom).fillna(0)
+    return counts
+
+def deaths_per_player(deaths: DeathEvents) -> pd.DataFrame:
+    """
+    Number of deaths per player and sentiment category.
+    returns: columns ['player', 'sentiment', 'deaths']
+    """
+    counts = deaths.frame.groupby(['player', 'sentiment'], sort=False).size().rename('deaths').reset_index()
+    counts['player'] = [deaths.player_ids[pid] for pid in counts['player']]
+    return counts
+
+def scan_room_visits(csv_path: str) -> list:
+    """
+    Stream a PlayerPositions.csv in chunks, reading only the Timestamp, Level and Deaths columns.
+    returns: list of [room, start, end, samples, attempts] with ISO formatted timestamps
+    """
+    spans = dict()
+    attempts = dict()
+    for chunk in pd.read_csv(csv_path, usecols=["Timestamp", "Level", "Deaths"], parse_dates=["Timestamp"], chunksize=CSV_CHUNK_SIZE):
+        grouped = chunk.groupby("Level").agg(start=("Timestamp", "min"), end=("Timestamp", "max"), samples=("Timestamp", "size"))
+        for room, start, end, samples in grouped.itertuples():
+            if room in spans:
+                prev_start, prev_end, prev_samples = spans[room]
+                start, end, samples = min(start, prev_start), max(end, prev_end), samples + prev_samples
+            spans[room] = (start, end, samples)
+
+        for room, deaths in chunk.dropna(subset=["Deaths"]).groupby("Level")["Deaths"].unique().items():
+            attempts.setdefault(room, set()).update(deaths.tolist())
+
+    return [
+        [room, start.isoformat(), end.isoformat(), int(samples), len(attempts[room])]
+        for room, (start, end, samples) in spans.items()
+    ]
+
+def room_visits(archives: dict, cache: ParseCache | None = None) -> pd.DataFrame:
+    """
+    Summarize each player's PlayerPositions.csv per room: first and last timestamp, number of samples and attempts.
+    Players are indexed in the order of the archives; unreadable CSV files are skipped with a warning,
+    so those players count as having no playtime.
+    returns: columns ['player', 'room', 'start', 'end', 'samples', 'attempts']
+    """
+    rows = []
+    for pid, (csv_path, _) in enumerate(archives.values()):
+        visits = cache.get("visits", csv_path, scan_room_visits) if cache is not None else try_parse(scan_room_visits, csv_path)
+        if visits is None:
+            continue
+        rows.extend([pid, *visit] for visit in visits)
+
+    visits = pd.DataFrame(rows, columns=VISIT_COLUMNS)
+    visits['start'] = pd.to_datetime(visits['start'], format="ISO8601")
+    visits['end'] = pd.to_datetime(visits['end'], format="ISO8601")
+    return visits
+
+def playtime_per_player(archives: dict, deaths: DeathEvents, visits: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Total playtime of each player, summed over the time spent in each level.
+    returns: columns ['player', 'sentiment', 'minutes']
+    """
+    if visits is None:
+        visits = room_visits(archives)
+
+    total_seconds = pd.Series(0.0, index=range(len(archives)))
+    visits = visits.assign(level=_room_levels(visits['room'])).dropna(subset=['level'])
+    if not visits.empty:
+        level_spans = visits.groupby(['player', 'level']).agg(start=('start', 'min'), end=('end', 'max'))
+        seconds = (level_spans['end'] - level_spans['start']).dt.total_seconds()
+        total_seconds = seconds.groupby(level='player').sum().reindex(total_seconds.index, fill_value=0.0)
+
+    return pd.DataFrame({
+        'player': list(archives.keys()),
+        'sentiment': deaths.player_sentiments().values,
+        'minutes': total_seconds.values / 60.0,
+    })
+
+def time_per_room_per_sentiment(archives: dict, deaths: DeathEvents, visits: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Average time spent per room and sentiment category, over the players of that category who visited the room.
+    returns: columns ['level', 'room', 'sentiment', 'seconds', 'players']
+    """
+    if visits is None:
+        visits = room_visits(archives)
+
+    if visits.empty:
+        return pd.DataFrame(columns=['level', 'room', 'sentiment', 'seconds', 'players'])
+
+    visits = visits.assign(
+        level=_room_levels(visits['room']),
+        sentiment=visits['player'].map(deaths.player_sentiments()),
+        seconds=(visits['end'] - visits['start']).dt.total_seconds(),
+    ).dropna(subset=['level', 'sentiment'])
+
+    return (
+        visits.groupby(['level', 'room', 'sentiment'])
+        .agg(seconds=('seconds', 'mean'), players=('player', 'nunique'))
+        .reset_index()
+    )
+
+def compute_metrics(archives: dict, deaths: DeathEvents, stages: Iterable[str] = STAGES, cache: ParseCache | None = None, visits: pd.DataFrame | None = None) -> Dict[str, pd.DataFrame]:
+    """
+    Compute the metric tables behind the plots of the given report stages.
+    visits are the room visits of the archives, which are read (through the cache) if not given.
+    """
+    stages = set(stages)
+    tables = dict()
+
+    if visits is None and stages & {"paths", "time"}:
+        visits = room_visits(archives, cache)
+    if "paths" in stages:
+        player_ids = list(archives.keys())
+        paths = visits.copy()
+        paths['player'] = [player_ids[pid] for pid in paths['player']]
+        tables["room_visits"] = paths
+
+    if "deaths" in stages:
+        tables["deaths_per_room"] = deaths_per_room(deaths).reset_index()
+
+    if "sentiment" in stages:
+        tables["deaths_per_sentiment"] = deaths_per_sentiment(deaths).reset_index()
+        tables["deaths_per_room_per_sentiment"] = deaths_per_room_per_sentiment(deaths)
+        tables["deaths_per_player"] = deaths_per_player(deaths)
+
+    if "time" in stages:
+        tables["playtime_per_player"] = playtime_per_player(archives, deaths, visits)
+        tables["time_per_room_per_sentiment"] = time_per_room_per_sentiment(archives, deaths, visits)
+
+    return tables
+
+def write_metrics(tables: Dict[str, pd.DataFrame], metrics_format: str, output_path: str) -> None:
+    """
+    Write metric tables as a single JSON document, or as one CSV file per table.
+    For JSON, an output_path of "-" writes to stdout.
+    """
+    if metrics_format == "json":
+        document = {name: json.loads(table.to_json(orient="records", date_format="iso")) for name, table in tables.items()}
+        if output_path == "-":
+            json.dump(document, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+            return
+
+        os.makedirs(output_path, exist_ok=True)
+        with open(os.path.join(output_path, "metrics.json"), "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    elif metrics_format == "csv":
+        os.makedirs(output_path, exist_ok=True)
+        for name, table in tables.items():
+            table.to_csv(os.path.join(output_path, f"{name}.csv"), index=False)
+
+    else:
+        raise ValueError(f"Unknown metrics format '{metrics_format}', expected one of {METRIC_FORMATS}")
+
+def summarize_archive(archive_path: str, cache_path: str | None = PARSE_CACHE_PATH) -> dict:
+    """
+    Return the numbers shown by the summary plots without rendering anything:
+    deaths per room, deaths per sentiment, and playtime per sentiment cohort.
+    Parsed log and CSV files are cached in cache_path (None disables the cache).
+    """
+    cache = ParseCache(cache_path) if cache_path is not None else None
+
+    archives = extract_archives(archive_path)
+    deaths = build_death_events(archives, cache)
+    visits = room_visits(archives, cache)
+    if cache is not None:
+        cache.save()
+
+    room_deaths = deaths_per_room(deaths)
+    sentiment_deaths = deaths_per_sentiment(deaths)
+    playtime = playtime_per_player(archives, deaths, visits).dropna(subset=["sentiment"])
+
+    return {
+        "players": deaths.n_players,
+        "deaths": int(len(deaths)),
+        "deaths_per_room": {
+            room: {"level": row.level, "deaths": int(row.deaths), "players": int(row.players), "average": float(row.average)}
+            for room, row in room_deaths.iterrows()
+        },
+        "deaths_per_sentiment": {
+            sentiment: {"deaths": int(row.deaths), "players": int(row.players), "average": float(row.average)}
+            for sentiment, row in sentiment_deaths.iterrows()
+        },
+        "playtime_per_sentiment": {
+            sentiment: {
+                "players": int(minutes.size),
+                "mean_minutes": float(minutes.mean()),
+                "median_minutes": float(minutes.median()),
+                "min_minutes": float(minutes.min()),
+                "max_minutes": float(minutes.max()),
+            }
+            for sentiment, minutes in playtime.groupby("sentiment")["minutes"]
+        },
+    }
@@ -0,0 +1,98 @@
+import argparse
+from datetime import datetime, timedelta
+
+from events import ParseCache, extract_archives, filter_archives, build_death_events
+from metrics import STAGES, METRIC_FORMATS, room_visits, compute_metrics, write_metrics
+
+
+# Constants
+ARCHIVE_PATH = "./Logs/Archived/"
+GRAPH_PATH = "./Logs/Graphs/"
+IMAGE_FORMATS = ("png", "pdf", "svg", "jpg")
+
+def _parse_time(value: str, end_of_day: bool = False) -> datetime:
+    """
+    Parse an ISO date or date-time; a bare date is extended to the end of that day if end_of_day is set.
+    Times with a UTC offset are converted to naive local time, matching the log file names.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+
+    if end_of_day and len(value) == len("YYYY-MM-DD"):
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate graphs and metric tables from archived EngagementBaiting experiments.")
+    parser.add_argument("archive_path", nargs="?", default=ARCHIVE_PATH, help=f"directory of archived experiments (default: {ARCHIVE_PATH})")
+    parser.add_argument("--graph-path", default=GRAPH_PATH, help=f"output directory for graphs (default: {GRAPH_PATH})")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="report stages to run (default: all)")
+    parser.add_argument("--players", nargs="+", metavar="ID", help="only include these experiment IDs")
+    parser.add_argument("--since", type=_parse_time, help="only include experiments with a log started at or after this date")
+    parser.add_argument("--until", type=lambda value: _parse_time(value, end_of_day=True), help="only include experiments with a log started at or before this date")
+    parser.add_argument("--format", dest="image_format", choices=IMAGE_FORMATS, default="png", help="image format of the graphs (default: png)")
+    parser.add_argument("--dpi", type=float, help="resolution of the graphs (default: matplotlib's figure dpi)")
+    parser.add_argument("--metrics", choices=METRIC_FORMATS, help="also write the metric tables of the selected stages in this format")
+    parser.add_argument("--metrics-path", help="output directory for metric tables, or '-' to print JSON to stdout (default: the graph path)")
+    parser.add_argument("--no-cache", action="store_true", help="parse all archive files again instead of using the parse cache")
+    parser.add_argument("--no-plots", action="store_true", help="only compute metric tables; do not render (or import) matplotlib")
+    parser.add_argument("--show-summary", action="store_true", help="show summarization plots while generating them")
+    parser.add_argument("--show-individual", action="store_true", help="show per-player and per-room plots while generating them")
+    return parser
+
+def main(argv: list | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.no_plots and args.metrics is None:
+        parser.error("--no-plots requires --metrics")
+    if args.metrics_path == "-" and args.metrics != "json":
+        parser.error("writing metrics to stdout requires --metrics json")
+
+    if args.since is not None and args.until is not None and args.since > args.until:
+        parser.error("--since must not be later than --until")
+
+    all_archives = extract_archives(args.archive_path)
+    unknown_players = sorted(set(args.players or []) - set(all_archives))
+    if unknown_players:
+        parser.error(f"unknown experiment ID(s): {', '.join(unknown_players)}")
+
+    archives = filter_archives(all_archives, players=args.players, since=args.since, until=args.until)
+    if not archives:
+        parser.error(f"no experiments in '{args.archive_path}' match the given selection")
+
+    cache = None if args.no_cache else ParseCache()
+
+    # Only the path stage can do without the parsed logs
+    deaths = build_death_events(archives, cache) if set(args.stages) - {"paths"} else None
+
+    # Room visits are shared by the metric tables and the time plots; the path plots read the full CSV files
+    needs_visits = "time" in args.stages or (args.metrics is not None and "paths" in args.stages)
+    visits = room_visits(archives, cache) if needs_visits else None
+
+    if args.metrics is not None:
+        tables = compute_metrics(archives, deaths, args.stages, cache, visits)
+        write_metrics(tables, args.metrics, args.metrics_path or args.graph_path)
+
+    if cache is not None:
+        cache.save()
+
+    if not args.no_plots:
+        # Imported here so that metric-only runs never load matplotlib
+        from plotter import plot_reports
+        plot_reports(
+            archives, deaths, args.graph_path, args.stages,
+            show_summarization_plots=args.show_summary,
+            show_individual_plots=args.show_individual,
+            image_format=args.image_format,
+            dpi=args.dpi,
+            visits=visits,
+        )
+
+if __name__ == "__main__":
+    main()
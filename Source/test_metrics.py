@@ -0,0 +1,36 @@
+import os
+
+from metrics import summarize_archive
+
+
+def _write_archive(archive_path):
+    experiment = os.path.join(archive_path, "20250101_120000")
+    os.makedirs(experiment)
+    open(os.path.join(experiment, "P0.txt"), "w").close()
+
+    with open(os.path.join(experiment, "PlayerPositions.csv"), "w", encoding="utf-8") as f:
+        f.write("Timestamp,Level,X,Y,SessionTime,Deaths\n")
+        f.write("2025-01-01T12:00:00Z,StartWalkRoomTutorial,-500,0,0.0,0\n")
+        f.write("2025-01-01T12:01:00Z,StartWalkRoomTutorial,-400,0,60.0,1\n")
+        f.write("2025-01-01T12:02:00Z,JumpRoomTutorial,-200,0,120.0,1\n")
+
+    with open(os.path.join(experiment, "EngagementBaiting-20250101120000.log"), "w", encoding="utf-8") as f:
+        f.write('[2025-01-01 12:00:00.000] Entering screen "StartWalkRoomTutorial"\n')
+        f.write('[2025-01-01 12:00:30.000] Showing positive death screen message "Nice try"\n')
+        f.write('[2025-01-01 12:00:30.000] The player died at {X:-450 Y:0}\n')
+
+def test_summarize_archive_is_independent_of_working_directory(tmp_path, monkeypatch):
+    archive_path = str(tmp_path / "Archived")
+    _write_archive(archive_path)
+
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from_root = summarize_archive(archive_path, None)
+
+    monkeypatch.chdir(tmp_path)
+    elsewhere = summarize_archive(archive_path, None)
+    cached = summarize_archive(archive_path, str(tmp_path / "parse_cache.json"))
+
+    assert from_root == elsewhere == cached
+    assert from_root["deaths_per_room"]["StartWalkRoomTutorial"]["level"] == "Tutorial"
+    assert from_root["playtime_per_sentiment"]["positive"]["mean_minutes"] == 2.0
+    assert not os.path.exists(tmp_path / "Logs")